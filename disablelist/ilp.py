@@ -1,7 +1,10 @@
-import pickle, random, os
+import pickle, random, os, sys
+from contextlib import contextmanager
 import numpy as np
-from mip import Model, MAXIMIZE, MINIMIZE, CBC, BINARY, xsum
+from mip import Model, MAXIMIZE, MINIMIZE, CBC, GRB, BINARY, xsum
 from problib.data import *
+# python-mip's API is the same for both solvers, use Gurobi if licensed
+SOLVER = GRB if os.environ.get("USE_GUROBI") else CBC
 ### general ILP giving the structure of the problem
 
 # number of bundles, number of series
@@ -11,12 +14,20 @@ s = [size[bundle] for bundle in bundle_list] + \
     [series_dict[series][-1] for series in series_list]
 # list[int] mapping series index -> $wa characters
 w = [series_dict_wa[series][-1] for series in series_list]
+# list[list[int]] mapping series index -> indexes of bundles containing it
+series_index = {series: i for i, series in enumerate(series_list)}
+series_bundles = [[] for _ in range(M)]
+for j, bundle in enumerate(bundle_list):
+    for series in bundle_dict[bundle]:
+        if series in series_index:
+            series_bundles[series_index[series]].append(j)
 
 def model(antidisable: bool=True, disable_series: bool=True,
-          force_disable: bool=True) -> tuple:
+          force_disable: bool=True, num_disable: int=NUM_DISABLE,
+          overlap: int=OVERLAP, num_antidisable: int=NUM_ANTIDISABLE) -> tuple:
     """ Generates a model. """
     ### model and variables
-    m = Model(sense=MAXIMIZE, solver_name=CBC)
+    m = Model(sense=MAXIMIZE, solver_name=SOLVER)
     global x, y
     A = M if disable_series else 0
     # whether the ith bundle/series is disabled
@@ -24,23 +35,22 @@ def model(antidisable: bool=True, disable_series: bool=True,
     # whether the ith series is included or not
     y = [m.add_var(name=f"y{i}", var_type=BINARY) for i in range(M)]
     if antidisable:
-        global z
-        # whether the ith series is antidisabled or not
-        z = [m.add_var(name=f"z{i}", var_type=BINARY) for i in range(M)]
+        global u
+        # whether the ith series is disabled and not antidisabled, y - z
+        u = [m.add_var(name=f"u{i}", var_type=BINARY) for i in range(M)]
 
     ### constraints
     # can only disable up to K = 10 bundles, exactly K is faster but inaccurate
     # change to == K if it doesn't affect the solution and is faster
-    m += xsum(x) <= NUM_DISABLE, "number_disable"
+    m += xsum(x) <= num_disable, "number_disable"
     # total sum of bundle sizes less than C = 20,000
-    m += xsum(s[i]*x[i] for i in range(len(x))) <= OVERLAP, "capacity_limit"
+    m += xsum(s[i]*x[i] for i in range(len(x))) <= overlap, "capacity_limit"
     if antidisable:
-        # can only antidisable up to A = 500 series
-        m += xsum(z) <= NUM_ANTIDISABLE, "number_antidisable"
+        # can only antidisable up to A = 500 series, sum of z = y - u
+        m += xsum(y) - xsum(u) <= num_antidisable, "number_antidisable"
     for i in range(M):
-        yi, name = y[i], series_list[i]
-        bundles = [x[j] for j in range(N)
-                   if name in bundle_dict[bundle_list[j]]]
+        yi = y[i]
+        bundles = [x[j] for j in series_bundles[i]]
         if disable_series:
             # the psuedo-bundle containing just the series
             bundles.append(x[i + N])
@@ -51,11 +61,72 @@ def model(antidisable: bool=True, disable_series: bool=True,
             m += xsum(bundles) <= len(bundles)*yi, f"forcing{i}"
         # shouldn't antidisable a series if it isn't disabled
         if antidisable:
-            m += z[i] <= yi, f"antidisable{i}"
+            m += u[i] <= yi, f"antidisable{i}"
 
     m.emphasis = 2 # emphasize optimality
+    m.threads = -1 # use all available cores
 
-    return (m, x, y, z) if antidisable else (m, x, y)
+    return (m, x, y, u) if antidisable else (m, x, y)
+
+def resolve(m: Model, **limits: int):
+    """ Re-optimizes a model after changing the limits on the constraints,
+        e.g. resolve(m, number_disable=15), warm starting from the last
+        solution instead of rebuilding the model from scratch. """
+    # the previous incumbent is a MIPStart, CBC discards it if now infeasible
+    if m.num_solutions > 0:
+        m.start = [(var, round(var.x)) for var in m.vars
+                   if var.var_type == BINARY]
+    for name, rhs in limits.items():
+        m.constr_by_name(name).rhs = rhs
+    return m.optimize()
+
+@contextmanager
+def quiet():
+    """ Silences output written to stdout by the solver's C library. """
+    sys.stdout.flush()
+    stdout = os.dup(1)
+    with open(os.devnull, "w") as devnull:
+        os.dup2(devnull.fileno(), 1)
+        try:
+            yield
+        finally:
+            os.dup2(stdout, 1)
+            os.close(stdout)
+
+def lp_start(m: Model) -> list:
+    """ Rounds the LP relaxation into a MIPStart, m.start = lp_start(m). """
+    # variables of m by kind, in index order, as created by model()
+    x, y, u = ([var for var in m.vars if var.name[0] == kind]
+               for kind in "xyu")
+    # solve the relaxation on a copy to leave m's solution alone
+    relaxed = m.copy()
+    with quiet(): # Clp logs the relaxation regardless of verbose
+        relaxed.optimize(relax=True)
+    x_lp = [relaxed.vars[var.idx].x for var in x]
+    limit, capacity = (m.constr_by_name(name).rhs
+                       for name in ["number_disable", "capacity_limit"])
+    # list[list[int]] mapping bundle/series index -> series it disables
+    cover = [[] for _ in range(N)] + [[i] for i in range(len(x) - N)]
+    for i, bundles in enumerate(series_bundles):
+        for j in bundles:
+            cover[j].append(i)
+    # greedily disable the bundles the relaxation disables the most,
+    # breaking ties by $wa characters per character disabled
+    order = sorted(range(len(x)), key=lambda j: (
+        -x_lp[j], -sum(w[i] for i in cover[j])/max(s[j], 1)))
+    disabled, total, covered = set(), 0, set()
+    for j in order:
+        if len(disabled) == limit:
+            break
+        if total + s[j] <= capacity:
+            disabled.add(j)
+            total += s[j]
+            covered.update(cover[j])
+    # include exactly the covered series and antidisable none of them
+    start = [(x[j], int(j in disabled)) for j in range(len(x))] + \
+            [(y[i], int(i in covered)) for i in range(M)]
+    start += [(u[i], int(i in covered)) for i in range(len(u))]
+    return start
 
 def display(antidisable: bool=True, disable_series: bool=True):
     """ Displays the result of the optimization. """
@@ -72,16 +143,18 @@ def display(antidisable: bool=True, disable_series: bool=True):
     print(f"$disable {' $'.join(disable_list)}")
 
     if antidisable:
-        antidisable_list = [series_list[i] for i in range(M) if z[i].x >= tol]
+        antidisable_list = [series_list[i] for i in range(M)
+                            if y[i].x >= tol and u[i].x <= 1 - tol]
         count_anti = get_wa(antidisable_list)
         print(f"antidisablelist ({len(antidisable_list)}/{NUM_ANTIDISABLE})")
         print(f"{count_anti} antidisabled characters")
         print(f"$antidisable {' $'.join(antidisable_list)}")
 
 if __name__ == "__main__":
+    m, x, y, u = model()
     ### objective: load coefficients from numpy array 
     coef = np.load("linreg_coef.npy")
-    m.objective = xsum(coef[i]*(y[i] - z[i]) for i in range(M))
+    m.objective = xsum(coef[i]*u[i] for i in range(M))
 
     status = m.optimize()
     display()
@@ -2,9 +2,9 @@ from .ilp import *
 ### find U on the relaxation
 
 if __name__ == "__main__":
-    m, x, y, z = model()
+    m, x, y, u = model()
     ### objective: maximize d by minimizing the denominator 
-    m.objective = xsum(w[i]*(1 - (y[i] - z[i])) for i in range(M))
+    m.objective = xsum(w[i]*(1 - u[i]) for i in range(M))
 
     m.sense = MINIMIZE
     status = m.optimize(relax=True)
@@ -196,7 +196,7 @@ g = 12
 if graphs[g]:
     poly = convolve.get_poly(X, p)
     for i, n in enumerate([1, 50, 100, 200]):
-        pmf = convolve.poly_exp(poly, n)
+        pmf = convolve.poly_exp_fft(poly, n)
         graph_rv([i/n for i in range(len(pmf))], [x*n for x in pmf], i, f"X_{n}")
     plt.xlim(20, 100)
     plt.title("Average of X after n samples")
@@ -1,5 +1,12 @@
-import cmath, math
+import cmath
+import numpy as np
+try:
+    from numba import njit
+    JIT = True
+except ImportError: # run the kernels on lists in the interpreter instead
+    njit, JIT = lambda *args, **kwargs: lambda f: f, False
 
+@njit(cache=True)
 def rev_increment(c: int, m: int) -> int:
     """ Increments a reverse binary counter. """
     i = 1 << (m - 1)
@@ -8,63 +15,89 @@ def rev_increment(c: int, m: int) -> int:
         i >>= 1
     return c ^ i
 
-def bit_rev_copy(a: list) -> list:
+@njit(cache=True)
+def bit_rev_copy(a: np.ndarray, A: np.ndarray) -> np.ndarray:
     """ Constructs an order from a by reversing the bits of the index. """
-    n, m = len(a), len(a).bit_length() - 1
-    A = [0]*n
+    n, m = len(a), 0
+    while (1 << (m + 1)) <= n:
+        m += 1
     c = 0
     for i in range(n):
         A[c] = a[i]
         c = rev_increment(c, m)
     return A
 
-def iter_fft(a: list, inv: bool=False) -> list:
-    """ Computes the DFT iteratively. """
-    n = len(a)
-    A = bit_rev_copy(a)
-    for s in range(1, n.bit_length()):
+@njit(cache=True, fastmath=True)
+def _iter_fft(A: np.ndarray, inv: bool) -> np.ndarray:
+    """ Computes the DFT of a bit-reversed array in-place. """
+    n = len(A)
+    s = 1
+    while (1 << s) <= n:
         m = 1 << s
-        wm = cmath.exp((-1 if inv else 1)*2*cmath.pi*1j/m)
+        half = m >> 1
+        # twiddle factors for the stage, more accurate than repeated w *= wm
+        W = [cmath.exp((-1 if inv else 1)*2j*cmath.pi*j/m)
+             for j in range(half)]
         for k in range(0, n, m):
-            w = 1
-            for j in range(m >> 1):
-                t = w*A[k + j + (m >> 1)]
+            for j in range(half):
+                t = W[j]*A[k + j + half]
                 u = A[k + j]
                 A[k + j] = u + t
-                A[k + j + (m >> 1)] = u - t
-                w *= wm
+                A[k + j + half] = u - t
+        s += 1
     return A
 
-def inv_iter_fft(a: list) -> list:
+def iter_fft(a: list, inv: bool=False) -> np.ndarray:
+    """ Computes the DFT iteratively. """
+    a = np.asarray(a, dtype=np.complex128)
+    assert len(a) & (len(a) - 1) == 0, "length must be a power of 2"
+    if not JIT: # numpy scalars are slow in the interpreter, use lists
+        return np.array(_iter_fft(bit_rev_copy(a.tolist(), [0j]*len(a)), inv))
+    return _iter_fft(bit_rev_copy(a, np.empty_like(a)), inv)
+
+def inv_iter_fft(a: list) -> np.ndarray:
     """ Computes the inverse DFT of a. """
-    return [x/len(a) for x in iter_fft(a, True)]
+    return iter_fft(a, True)/len(a)
 
-def mirror(a: list) -> list:
-    """ Pads a to make its length a power of 2. """
-    n, np = len(a), 1 << math.ceil(math.log2(len(a)))
-    a += [0]*(np - n)
-    return a
+def pad(m: int) -> int:
+    """ Smallest power of 2 that is at least m. """
+    return 1 << (m - 1).bit_length()
 
 def poly_mult(a: list, b: list) -> list:
     """ Multiplies two polynomials via the FFT. """
     m = len(a) + len(b) - 1
-    n = max(len(a), len(b))
-    # make both lists the same size and degree bound 2n instead of n
-    ap = mirror(a + [0]*(n - len(a)) + [0]*n)
-    bp = mirror(b + [0]*(n - len(b)) + [0]*n)
-    ap, bp = iter_fft(ap), iter_fft(bp)
-    return [x.real for x in inv_iter_fft([ap[i]*bp[i] for i in range(len(ap))])]
+    # pad to a power of 2 with degree bound at least m
+    n = pad(m)
+    # coefficients are real, so only half of the spectrum is needed
+    ap, bp = np.fft.rfft(a, n=n), np.fft.rfft(b, n=n)
+    return np.fft.irfft(ap*bp, n=n)[:m].tolist()
 
 def poly_exp(p: list, k: int) -> list:
     """ Computes p^k, where p is a polynomial and k is an integer. """
-    rtn = [1]
+    rtn = np.ones(1)
     while k > 0:
+        # rtn has lower powers of p than p itself, so len(rtn) <= len(p) and
+        # the padding for squaring p fits rtn*p, letting both share p's FFT
+        m = 2*len(p) - 1
+        n = pad(m)
+        P = np.fft.rfft(p, n=n)
         # bit on in the binary representation of the exponent
         if k & 1 == 1:
-            rtn = poly_mult(rtn, p)
+            d = len(rtn) + len(p) - 1
+            rtn = np.fft.irfft(np.fft.rfft(rtn, n=n)*P, n=n)[:d]
         k >>= 1
-        p = poly_mult(p, p)
-    return rtn
+        if k > 0:
+            p = np.fft.irfft(P*P, n=n)[:m]
+    return rtn.tolist()
+
+def poly_exp_fft(p: list, k: int) -> list:
+    """ Computes p^k by exponentiating pointwise in the frequency domain. """
+    m = k*(len(p) - 1) + 1
+    # pad to the degree bound of the result so the convolution doesn't wrap
+    n = pad(m)
+    P = np.fft.rfft(p, n=n)
+    # roundoff grows with k, use poly_exp if small coefficients matter
+    return np.fft.irfft(P**k, n=n)[:m].tolist()
 
 def get_poly(X: list, p: list) -> list:
     """ Gets the polynomial associated with the r.v. """
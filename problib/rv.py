@@ -1,4 +1,6 @@
-import random, bisect, math
+import random, bisect, math, itertools
+from functools import cached_property
+import numpy as np
 # library implementing a random variable
 # TODO: absorb testing.py
 
@@ -10,8 +12,8 @@ ITERS = 10**6    # iterations for emprical expected value
 
 def norm(l: list, f: float=None) -> list:
     """ Normalizes a list into a pmf by dividing by its sum. """
-    s = sum(l) if f is None else f
-    return [x/s for x in l]
+    l = np.asarray(l, dtype=np.float64)
+    return (l/(l.sum() if f is None else f)).tolist()
 
 def norm_cmf(l: list) -> list:
     """ Normalizes a list into a cmf by dividing by its max. """
@@ -41,17 +43,15 @@ def query(prefix: list, i: int, j: int) -> float:
 
 def prefix_sum(l: list) -> list:
     """ Returns the prefix sum of l. """
-    prefix = [0]*(len(l) + 1)
-    for i in range(len(l)):
-        prefix[i + 1] = prefix[i] + l[i]
-    return prefix
+    return list(itertools.accumulate(l, initial=0))
 
 class RandomVariable:
 
     """ A random variable. """
 
     def __init__(self, X: list, p: list, name: str="rv",
-                 is_cmf: bool=False, normalize: bool=False) -> None:
+                 is_cmf: bool=False, normalize: bool=False,
+                 validate: bool=True) -> None:
         p = (norm_cmf if is_cmf else norm)(p) if normalize else p
         self.X, self.p, self.name = X, p, name # list of values, probabilities
 
@@ -60,19 +60,38 @@ class RandomVariable:
                 setattr(self, attr, getattr(X, attr))
         else:
             self.D = {x: i for i, x in enumerate(X)} # value to index
-            assert sorted(X) == list(X), "support set must be sorted"
+            assert not validate or all(a <= b for a, b in zip(X, X[1:])), \
+                "support set must be sorted"
 
         if is_cmf:
             assert len(X) == len(p) - 1, "values not the same length as cmf"
-            assert cmf(p), "not a valid cmf"
-            self.p, self.F = [p[i + 1] - p[i] for i in range(len(X))], p
+            assert not validate or cmf(p), "not a valid cmf"
+            self.p, self.F = np.diff(p).tolist(), p
         else:
             assert len(X) == len(p),     "values not the same length as pmf"
-            assert pmf(p), "not a valid pmf"
+            assert not validate or pmf(p), "not a valid pmf"
             self.F = prefix_sum(p) # cmf
+        self._mean = None
 
         self.ev = prefix_sum([x*p for x, p in zip(self, self.p)])
 
+    ### numpy views, built on first use so construction stays cheap
+
+    @cached_property
+    def _X(self) -> np.ndarray:
+        return self.X._X if isinstance(self.X, RandomVariable) else \
+               np.asarray(self.X)
+
+    @cached_property
+    def _p(self) -> np.ndarray: return np.asarray(self.p, dtype=np.float64)
+    @cached_property
+    def _F(self) -> np.ndarray: return np.asarray(self.F, dtype=np.float64)
+
+    @cached_property
+    def _nz(self) -> np.ndarray:
+        """ Indexes of values with nonzero probability. """
+        return np.flatnonzero(self._p)
+
     ### Python "magic" class methods
 
     def __repr__(self) -> str: return f"RandomVariable({self.X}, {self.p})"
@@ -90,20 +109,35 @@ mean = {self.E():.3f} +/- {self.std():.3f} (std)"
         return self.p[self.D[u]] if u in self.D else 0
 
     def cmf(self, u: float) -> float:
-        """ Finds the cmf at a value in/not in the underlying r.v. """
+        """ Finds the cmf at a value in/not in the underlying r.v.,
+            or at each value if u is an array. """
+        if hasattr(u, "__len__"): # array of queries
+            # F[i] is the probability of the first i values, count <= u
+            return self._F[np.searchsorted(self._X, u, side="right")]
         # use F if u is in the range of the r.v., otherwise binary search
         return self.F[self.D[u] + 1] if u in self.D else \
                self.F[bisect.bisect(self.X, u)]
 
     ### transformations
 
-    def transform(self, f):
-        """ Returns a new random variable transformed by a given function. """
+    def transform(self, f, f_vec=None):
+        """ Returns a new random variable transformed by a given function.
+            f_vec, if given, is f applied element-wise to a numpy array of
+            the support in its dtype, so it must not overflow the dtype. """
+        if f_vec is not None:
+            y = np.asarray(f_vec(self._X))
+            if y.dtype.kind in "biuf": # numeric, group with numpy
+                Y, index = np.unique(y, return_inverse=True)
+                p = np.bincount(index.ravel(), weights=self._p,
+                                minlength=len(Y))
+                # sorted support and same total probability, already valid
+                return RandomVariable(Y.tolist(), p.tolist(), validate=False)
         freq = {}
-        for x in self:
+        for x, p in zip(self, self.p):
             y = f(x)
-            freq[y] = freq.get(y, 0) + self.pmf(x)
-        return RandomVariable(*map(list, zip(*sorted(freq.items()))))
+            freq[y] = freq.get(y, 0) + p
+        Y, p = map(list, zip(*sorted(freq.items())))
+        return RandomVariable(Y, p, validate=False)
 
     def map(self, f):
         """ Returns a new random variable with probabilities given by f. """
@@ -111,13 +145,18 @@ mean = {self.E():.3f} +/- {self.std():.3f} (std)"
 
     ### probability theory statistics
 
-    def E(self, f=lambda x: x) -> float:
+    def E(self, f=None) -> float:
         """ Expected value of a pmf represented by a list. """
-        return sum(f(x)*p for x, p in zip(self, self.p))
+        if f is not None:
+            return sum(f(x)*p for x, p in zip(self, self.p) if p != 0)
+        if self._mean is None:
+            self._mean = float(self._X[self._nz] @ self._p[self._nz])
+        return self._mean
 
     def Var(self) -> float:
         """ Var[X] = E[(x - u)^2] = E[X^2] - E[x]^2. """
-        return self.E(lambda x: x*x) - self.E()**2
+        X, p = self._X[self._nz], self._p[self._nz]
+        return float(X @ (X*p)) - self.E()**2
 
     def std(self) -> float:
         """ sigma^2 = Var[x] so sigma = standard deviation = sqrt(Var[X]). """